@@ -1,13 +1,73 @@
+"""
 Emotion Detection System
 Classifies text into emotions: happy, sad, angry, surprise, fear, or neutral
+"""
 
+import os
 import re
-from collections import Counter
-from typing import Dict, List, Tuple
-import string
-from flask import Flask, request, jsonify
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from operator import itemgetter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from flask import Flask, Response, request, jsonify
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to Flask's stdlib-json encoder
+    orjson = None
+
+# Matches URLs so they can be stripped before keyword analysis
+_URL_RE = re.compile(r'https?://\S+|www\.\S+')
+
+# Tokens in lowercased text, as (word, trailing) pairs. A word is a run of
+# Unicode letters, digits and underscores, keeping inner apostrophes and
+# hyphens so that contractions ("can't"), compounds ("mind-blowing"),
+# accented words, handles and alphanumerics stay one token. Leading
+# punctuation ("#happy", "*happy*") is skipped; trailing punctuation is
+# captured, and a whitespace-delimited chunk with no word at all ("...",
+# an emoji) matches as ('', ''). Either one ends the previous word's context,
+# like a raw token such as "no." or "!" did before tokenizing
+_TOKEN_RE = re.compile(r"(\w+(?:['-]\w+)*)([^\w\s]*)|[^\w\s]+(?!\S)")
+
+# Scored emotions, in the order used by score vectors
+_EMOTIONS = ('happy', 'sad', 'angry', 'surprise', 'fear')
+
+# Integer ids for every label predict_emotion can return, as returned by
+# predict_emotion_id and accepted by get_emotion_statistics
+EMOTION_LABELS = _EMOTIONS + ('neutral',)
+EMOTION_IDS = {emotion: i for i, emotion in enumerate(EMOTION_LABELS)}
+_NEUTRAL_ID = EMOTION_IDS['neutral']
+
+# Batches at least this large are scored in worker processes when more than
+# one CPU is available. Measured: ~8 us to score a text serially, while a pool
+# costs ~7 ms to start plus ~2 us of IPC per text, which puts break-even at
+# roughly 2,500 (4 CPUs) to 5,000 (2 CPUs) texts; the threshold leaves margin
+_PARALLEL_MIN_BATCH = 10_000
+
+# Detector used by pool worker processes, set by _init_worker
+_worker_detector = None
+
+def _init_worker(detector: 'EmotionDetector') -> None:
+    global _worker_detector
+    _worker_detector = detector
+
+def _call_in_worker(func: Callable[['EmotionDetector', str], Any], text: str) -> Any:
+    return func(_worker_detector, text)
+
+def _available_cpus() -> int:
+    """CPUs this process may run on, honouring affinity and cpuset limits"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
 
 class EmotionDetector:
+    # Fixed attribute set: no per-instance __dict__, slot-based attribute access
+    __slots__ = (
+        'emotion_keywords', 'intensifiers', 'negations', 'emotion_emojis',
+        '_word2emotion', '_intensifier_set', '_negation_set',
+        '_emoji2emotion', '_emoji_re',
+    )
+    
     def __init__(self):
         # Emotion keywords dictionary
         self.emotion_keywords = {
@@ -63,93 +123,159 @@ class EmotionDetector:
             'surprise': ['😲', '😮', '😯', '😳', '🤯', '‼️', '⁉️'],
             'fear': ['😨', '😰', '😱', '🙀', '😧', '😦']
         }
+        
+        self.rebuild_lookups()
+    
+    def rebuild_lookups(self) -> None:
+        """
+        Rebuild the lookup tables used for scoring from emotion_keywords,
+        intensifiers, negations and emotion_emojis
+        Call this after changing any of those; scoring only reads the tables
+        """
+        # Inverted index: word -> ids of the emotions it belongs to (a word
+        # such as 'amazing' is listed under more than one emotion)
+        self._word2emotion = {}
+        for emotion, keywords in self.emotion_keywords.items():
+            emotion_id = EMOTION_IDS[emotion]
+            for word in keywords:
+                emotion_ids = self._word2emotion.setdefault(word, ())
+                if emotion_id not in emotion_ids:
+                    self._word2emotion[word] = emotion_ids + (emotion_id,)
+        
+        self._intensifier_set = frozenset(self.intensifiers)
+        self._negation_set = frozenset(self.negations)
+        
+        # Emoji -> ids of the emotions it belongs to, plus one pattern that
+        # finds every known emoji in a single scan (longest first, since some
+        # emojis carry a trailing variation selector)
+        self._emoji2emotion = {}
+        for emotion, emojis in self.emotion_emojis.items():
+            emotion_id = EMOTION_IDS[emotion]
+            for emoji in emojis:
+                emotion_ids = self._emoji2emotion.setdefault(emoji, ())
+                if emotion_id not in emotion_ids:
+                    self._emoji2emotion[emoji] = emotion_ids + (emotion_id,)
+        self._emoji_re = re.compile('|'.join(
+            re.escape(emoji) for emoji in sorted(self._emoji2emotion, key=len, reverse=True)))
     
     def preprocess_text(self, text: str) -> str:
         """Clean and normalize text"""
-        text = text.lower()
-        text = re.sub(r'http\S+|www.\S+', '', text)  # Remove URLs
-        return text
+        return _URL_RE.sub('', text.lower())  # Remove URLs
     
     def detect_emojis(self, text: str) -> Dict[str, int]:
         """Count emotion-related emojis in text"""
-        emoji_scores = {emotion: 0 for emotion in self.emotion_keywords.keys()}
+        counts = [0] * len(_EMOTIONS)
         
-        for emotion, emojis in self.emotion_emojis.items():
-            for emoji in emojis:
-                emoji_scores[emotion] += text.count(emoji)
+        for emoji in self._emoji_re.findall(text):
+            for emotion_id in self._emoji2emotion[emoji]:
+                counts[emotion_id] += 1
         
-        return emoji_scores
+        return dict(zip(_EMOTIONS, counts))
     
-    def calculate_emotion_scores(self, text: str) -> Dict[str, float]:
-        """Calculate scores for each emotion based on keywords"""
+    def _score_vector(self, text: str) -> List[float]:
+        """Calculate emotion scores as a list ordered like _EMOTIONS"""
         processed_text = self.preprocess_text(text)
-        words = processed_text.split()
+        tokens = _TOKEN_RE.findall(processed_text)
         
-        emotion_scores = {emotion: 0.0 for emotion in self.emotion_keywords.keys()}
+        scores = [0.0] * len(_EMOTIONS)
         
         # Add emoji scores
-        emoji_scores = self.detect_emojis(text)
-        for emotion, score in emoji_scores.items():
-            emotion_scores[emotion] += score * 2.0  # Weight emojis more
+        for emoji in self._emoji_re.findall(text):
+            for emotion_id in self._emoji2emotion[emoji]:
+                scores[emotion_id] += 2.0  # Weight emojis more
+        
+        # Texts without any keyword (typically neutral ones) skip the
+        # per-word loop after a single set-level check
+        if self._word2emotion.keys().isdisjoint(map(itemgetter(0), tokens)):
+            return scores
+        
+        # Bind lookups to locals for the per-word loop
+        word2emotion = self._word2emotion
+        intensifier_set = self._intensifier_set
+        negation_set = self._negation_set
         
         # Analyze words with context
-        for i, word in enumerate(words):
-            # Remove punctuation
-            word_clean = word.strip(string.punctuation)
-            
-            # Check for negation in previous words
-            is_negated = False
-            if i > 0 and words[i-1] in self.negations:
-                is_negated = True
-            
-            # Check for intensifiers
-            intensity = 1.0
-            if i > 0 and words[i-1] in self.intensifiers:
-                intensity = 1.5
-            
+        for i, (word, _) in enumerate(tokens):
             # Match word with emotion keywords
-            for emotion, keywords in self.emotion_keywords.items():
-                if word_clean in keywords:
-                    score = intensity
+            emotion_ids = word2emotion.get(word)
+            if emotion_ids is None:
+                continue
+            
+            # Only keyword hits need the previous word's context
+            score = 1.0
+            if i > 0:
+                previous, previous_trailing = tokens[i-1]
+                
+                # Context only carries over from a word with nothing glued after it
+                if previous and not previous_trailing:
+                    # Check for intensifiers
+                    if previous in intensifier_set:
+                        score = 1.5
                     
                     # If negated, reduce score significantly
-                    if is_negated:
+                    if previous in negation_set or previous.endswith("n't"):
                         score *= -0.5
-                    
-                    emotion_scores[emotion] += score
+            
+            for emotion_id in emotion_ids:
+                scores[emotion_id] += score
         
-        return emotion_scores
+        return scores
+    
+    def calculate_emotion_scores(self, text: str) -> Dict[str, float]:
+        """Calculate scores for each emotion based on keywords"""
+        return dict(zip(_EMOTIONS, self._score_vector(text)))
+    
+    def _label_id(self, scores: List[float]) -> int:
+        """Pick the label id for a score vector from _score_vector"""
+        # Find dominant emotion
+        max_score = max(scores)
+        
+        # If no emotions detected (all zero) or score is too low, consider it neutral
+        if max_score < 0.5:
+            return _NEUTRAL_ID
+        
+        return scores.index(max_score)
     
     def predict_emotion(self, text: str) -> Tuple[str, Dict[str, float]]:
         """
         Predict the dominant emotion in the text
         Returns: (emotion_label, confidence_scores)
         """
-        if not text or not text.strip():
+        if not text or text.isspace():
             return 'neutral', {}
         
-        emotion_scores = self.calculate_emotion_scores(text)
-        
-        # If no emotions detected, return neutral
-        if all(score == 0 for score in emotion_scores.values()):
-            return 'neutral', emotion_scores
-        
-        # Find dominant emotion
-        max_emotion = max(emotion_scores, key=emotion_scores.get)
-        max_score = emotion_scores[max_emotion]
-        
-        # If score is too low, consider it neutral
-        if max_score < 0.5:
-            return 'neutral', emotion_scores
+        scores = self._score_vector(text)
+        return EMOTION_LABELS[self._label_id(scores)], dict(zip(_EMOTIONS, scores))
+    
+    def predict_emotion_id(self, text: str) -> int:
+        """Predict the dominant emotion and return its id in EMOTION_IDS"""
+        if not text or text.isspace():
+            return _NEUTRAL_ID
         
-        return max_emotion, emotion_scores
+        return self._label_id(self._score_vector(text))
 
+    def _map_texts(self, func: Callable[['EmotionDetector', str], Any],
+                   texts: List[str]) -> List[Any]:
+        """
+        Apply an unbound detector method (e.g. EmotionDetector.predict_emotion)
+        to each text, using a process pool for large batches
+        """
+        workers = _available_cpus() if len(texts) >= _PARALLEL_MIN_BATCH else 1
+        if workers <= 1:
+            return [func(self, text) for text in texts]
+        
+        # A fresh pool per call, so workers always score with this
+        # detector's current keyword lists
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self,)) as pool:
+            return list(pool.map(partial(_call_in_worker, func), texts,
+                                 chunksize=max(1, len(texts) // (workers * 4))))
+    
     def analyze_batch(self, texts: List[str]) -> List[Dict]:
         """Analyze multiple texts and return results"""
         results = []
         
-        for text in texts:
-            emotion, scores = self.predict_emotion(text)
+        for text, (emotion, scores) in zip(texts, self._map_texts(EmotionDetector.predict_emotion, texts)):
             results.append({
                 'text': text[:100] + '...' if len(text) > 100 else text,
                 'emotion': emotion,
@@ -158,10 +284,27 @@ class EmotionDetector:
         
         return results
     
-    def get_emotion_statistics(self, texts: List[str]) -> Dict:
-        """Get overall emotion statistics from a collection of texts"""
-        emotions = [self.predict_emotion(text)[0] for text in texts]
-        emotion_counts = Counter(emotions)
+    def get_emotion_statistics(self, texts: List[str],
+                               emotion_ids: Optional[List[int]] = None) -> Dict:
+        """
+        Get overall emotion statistics from a collection of texts
+        emotion_ids: ids already predicted for texts (see predict_emotion_id
+        and EMOTION_IDS), to avoid analyzing the texts again
+        """
+        if emotion_ids is None:
+            emotion_ids = self._map_texts(EmotionDetector.predict_emotion_id, texts)
+        elif len(emotion_ids) != len(texts):
+            raise ValueError(
+                f'emotion_ids has {len(emotion_ids)} entries for {len(texts)} texts')
+        else:
+            invalid = set(emotion_ids).difference(range(len(EMOTION_LABELS)))
+            if invalid:
+                raise ValueError(f'emotion_ids contains unknown ids: {sorted(invalid)}')
+        
+        # Tally label ids into a fixed-size list instead of a Counter of strings
+        counts = [0] * len(EMOTION_LABELS)
+        for emotion_id in emotion_ids:
+            counts[emotion_id] += 1
         total = len(texts)
         
         statistics = {
@@ -171,28 +314,49 @@ class EmotionDetector:
                     'count': count,
                     'percentage': round((count / total) * 100, 2)
                 }
-                for emotion, count in emotion_counts.items()
+                for emotion, count in zip(EMOTION_LABELS, counts) if count
             },
-            'dominant_emotion': emotion_counts.most_common(1)[0][0] if emotions else 'neutral'
+            'dominant_emotion': EMOTION_LABELS[counts.index(max(counts))] if total else 'neutral'
         }
         
         return statistics
 
 app = Flask(__name__)
 
+def ojsonify(obj: Any, status: int = 200) -> Response:
+    """Build a JSON response, serialized with orjson when it is installed"""
+    if orjson is None:
+        response = jsonify(obj)
+        response.status_code = status
+        return response
+    return Response(orjson.dumps(obj), status=status, mimetype='application/json')
+
 # Initialize the emotion detector
 detector = EmotionDetector()
 
+# Longest text whose prediction is cached; longer texts are scored directly
+_CACHE_MAX_LEN = 512
+
+@lru_cache(maxsize=10_000)
+def _predict_cached(text: str) -> Tuple[str, Tuple[Tuple[str, float], ...]]:
+    """Memoized detector.predict_emotion, with scores as an immutable tuple"""
+    emotion, scores = detector.predict_emotion(text)
+    return emotion, tuple(scores.items())
+
 @app.route('/detect_emotion', methods=['POST'])
 def detect_emotion():
     data = request.get_json()
     text = data.get('text', '')
     if not text:
-        return jsonify({'error': 'No text provided'}), 400
+        return ojsonify({'error': 'No text provided'}, 400)
     
-    emotion, scores = detector.predict_emotion(text)
+    if len(text) <= _CACHE_MAX_LEN:
+        emotion, scores = _predict_cached(text)
+        scores = dict(scores)
+    else:
+        emotion, scores = detector.predict_emotion(text)
     
-    return jsonify({'emotion': emotion, 'scores': scores})
+    return ojsonify({'emotion': emotion, 'scores': scores})
 
 if __name__ == "__main__":
     # Initialize detector
@@ -232,7 +396,8 @@ if __name__ == "__main__":
     
     # Statistics
     print("\n📊 Emotion Statistics:\n")
-    stats = detector.get_emotion_statistics(sample_texts)
+    stats = detector.get_emotion_statistics(
+        sample_texts, [EMOTION_IDS[result['emotion']] for result in batch_results])
     print(f"Total texts analyzed: {stats['total_texts']}")
     print(f"Dominant emotion: {stats['dominant_emotion'].upper()}")
     print("\nEmotion Distribution:")
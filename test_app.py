@@ -0,0 +1,78 @@
+import pytest
+
+from app import EMOTION_IDS, EMOTION_LABELS, EmotionDetector
+
+detector = EmotionDetector()
+
+
+@pytest.mark.parametrize('text, emotion', [
+    # Leading punctuation does not break a negation
+    ("I am not #blessed", 'neutral'),
+    ("I'm not #happy today", 'neutral'),
+    ("never @happy", 'neutral'),
+    ("not *happy*", 'neutral'),
+    ("not -happy", 'neutral'),
+    ("not ...happy", 'neutral'),
+    ('not "happy"', 'neutral'),
+    # Punctuation after a word, or a chunk with no word, ends its context
+    ("Why not? Happy to help!", 'happy'),
+    ("Did it fail? No. Happy ending though.", 'happy'),
+    ("Is it bad? No! Happy as ever", 'happy'),
+    ('"not" happy', 'happy'),
+    ("not ... happy", 'happy'),
+    # Contractions ending in n't negate
+    ("I don't love it", 'neutral'),
+])
+def test_negation_context(text, emotion):
+    assert detector.predict_emotion(text)[0] == emotion
+
+
+@pytest.mark.parametrize('text, emotion', [
+    # Accented words, handles and alphanumerics are single tokens
+    ("Hellö there", 'neutral'),
+    ("caféhappy", 'neutral'),
+    ("@happy_user hi", 'neutral'),
+    ("#bad_day", 'neutral'),
+    ("happy123", 'neutral'),
+    # Inner hyphens and glued emojis keep the keyword
+    ("so mind-blowing", 'surprise'),
+    ("I hate😡", 'angry'),
+])
+def test_tokenization(text, emotion):
+    assert detector.predict_emotion(text)[0] == emotion
+
+
+@pytest.mark.parametrize('text, emotion', [
+    ("seehttp://sad.com", 'neutral'),
+    ("Xwww.sad.com", 'neutral'),
+    ("HTTP://SAD.COM", 'neutral'),
+    ("https://t.co/abc😊", 'happy'),
+])
+def test_urls(text, emotion):
+    assert detector.predict_emotion(text)[0] == emotion
+
+
+def test_rebuild_lookups():
+    custom = EmotionDetector()
+    custom.emotion_keywords['happy'].append('stoked')
+    custom.negations.remove('not')
+    custom.emotion_emojis['fear'].append('👻')
+    assert custom.predict_emotion("stoked 👻")[0] == 'neutral'
+    
+    custom.rebuild_lookups()
+    assert custom.predict_emotion("stoked")[0] == 'happy'
+    assert custom.predict_emotion("not happy")[0] == 'happy'
+    assert custom.detect_emojis("👻")['fear'] == 1
+
+
+def test_statistics_from_emotion_ids():
+    texts = ["so happy", "sad day", "hello"]
+    emotion_ids = [EMOTION_IDS[label] for label in ('happy', 'sad', 'neutral')]
+    assert (detector.get_emotion_statistics(texts, emotion_ids)
+            == detector.get_emotion_statistics(texts))
+
+
+@pytest.mark.parametrize('emotion_ids', [[0, 1], [0, 1, 2, 3], [0, 1, -1], [0, 1, len(EMOTION_LABELS)]])
+def test_statistics_rejects_bad_emotion_ids(emotion_ids):
+    with pytest.raises(ValueError):
+        detector.get_emotion_statistics(["a", "b", "c"], emotion_ids)